@@ -0,0 +1,143 @@
+"""Measures the bytes saved and requests avoided by the HTTP caching layer.
+
+Drives the app with simulated browsers through `TestClient`. A caching
+browser sends `Accept-Encoding`, keeps responses until their `Cache-Control`
+max-age runs out, then revalidates them with `If-None-Match`. A plain
+client fetches everything in identity every time.
+
+Visitors load the front page and its assets several times, then poll
+/decode on a few links, with and without `VITE_DECODE_MAX_AGE`.
+
+Run from the project root with:
+    python -m benchmarks.bench_cache
+"""
+
+import os
+import re
+import tempfile
+
+from collections import Counter
+
+os.environ.setdefault("VITE_PROTOCOL", "https")
+os.environ.setdefault("VITE_HOST", "localhost:8080")
+
+from fastapi.testclient import TestClient
+
+import src.api as api
+
+ACCEPT_ENCODING = "gzip, deflate, br"
+
+VISITORS        = 50
+VISITS          = 5
+VISIT_INTERVAL  = 60 * 60 # Simulated seconds between two visits
+PAGE_PATHS      = ["/", "/static/index.css", "/static/particles.js",
+                   "/static/background.json", "/static/title.json",
+                   "/static/logo.svg"]
+
+DECODE_LINKS    = 10
+DECODE_POLLS    = 30
+DECODE_INTERVAL = 10 # Simulated seconds between two polls
+DECODE_MAX_AGES = [0, 60]
+
+
+class Browser:
+    """Fetches paths like a browser would, recording what went over the wire.
+
+    Args:
+        client (TestClient): Client of the app
+        caching (bool): Whether responses are compressed, kept and revalidated
+    """
+
+    def __init__(self, client: TestClient, caching: bool) -> None:
+        self.client = client
+        self.caching = caching
+        self.cache = {} # path -> (etag, expiry time)
+        self.stats = Counter()
+
+    def get(self, path: str, now: float) -> None:
+        if not self.caching:
+            response = self.client.get(path, headers={"Accept-Encoding": "identity"})
+            self.record(response)
+            return
+
+        headers = {"Accept-Encoding": ACCEPT_ENCODING}
+        if path in self.cache:
+            etag, expiry = self.cache[path]
+            if now < expiry:
+                self.stats["avoided"] += 1
+                return
+            headers["If-None-Match"] = etag
+
+        response = self.client.get(path, headers=headers)
+        self.record(response)
+
+        max_age = re.search(r"max-age=(\d+)", response.headers.get("cache-control", ""))
+        expiry = now + int(max_age.group(1)) if max_age else now
+        self.cache[path] = (response.headers["etag"], expiry)
+
+    def record(self, response) -> None:
+        self.stats["requests"] += 1
+        self.stats[response.status_code] += 1
+        # Body bytes as sent, before the client decompresses them
+        self.stats["bytes"] += int(response.headers.get("content-length", 0))
+
+
+def report(name: str, stats: Counter) -> None:
+    print(f"  {name:<12} {stats['requests']:>6} requests "
+          f"({stats[200]} x 200, {stats[304]} x 304, {stats['avoided']} avoided), "
+          f"{stats['bytes']:>9} bytes")
+
+
+def savings(plain: Counter, caching: Counter) -> None:
+    print(f"  {'saved':<12} {plain['requests'] - caching['requests']:>6} requests "
+          f"({100 * (1 - caching['requests'] / plain['requests']):.1f}%), "
+          f"{plain['bytes'] - caching['bytes']:>9} bytes "
+          f"({100 * (1 - caching['bytes'] / plain['bytes']):.1f}%)")
+
+
+def bench_page(client: TestClient) -> None:
+    totals = {}
+    for caching in (False, True):
+        total = Counter()
+        for _ in range(VISITORS):
+            browser = Browser(client, caching)
+            for visit in range(VISITS):
+                for path in PAGE_PATHS:
+                    browser.get(path, now=visit * VISIT_INTERVAL)
+            total.update(browser.stats)
+        totals[caching] = total
+
+    print(f"Front page, {VISITORS} visitors x {VISITS} visits, {VISIT_INTERVAL}s apart")
+    report("plain", totals[False])
+    report("caching", totals[True])
+    savings(totals[False], totals[True])
+
+
+def bench_decode(client: TestClient) -> None:
+    urls = [client.get(f"/encode?value=https://example.com/{i}").json()["url"]
+            for i in range(DECODE_LINKS)]
+    paths = [f"/decode?url={url}" for url in urls]
+
+    def poll(caching: bool) -> Counter:
+        browser = Browser(client, caching)
+        for index in range(DECODE_POLLS):
+            for path in paths:
+                browser.get(path, now=index * DECODE_INTERVAL)
+        return browser.stats
+
+    print(f"\n/decode, {DECODE_LINKS} links polled {DECODE_POLLS} times, {DECODE_INTERVAL}s apart")
+    plain = poll(caching=False)
+    report("plain", plain)
+    for max_age in DECODE_MAX_AGES:
+        api.DECODE_MAX_AGE = max_age
+        caching = poll(caching=True)
+        report(f"max-age={max_age}", caching)
+        savings(plain, caching)
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        api.DB_PATH = "sqlite:///" + os.path.join(directory, "bench.db")
+        with TestClient(api.app) as client:
+            bench_page(client)
+            bench_decode(client)
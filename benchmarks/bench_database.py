@@ -0,0 +1,65 @@
+"""Measures read throughput of DbManager while a writer runs concurrently.
+
+For each reader thread count, readers look up random existing IDs for a
+fixed duration while one thread keeps inserting values and incrementing
+clicks. Read throughput should scale with threads, and writes should never
+fail with SQLITE_BUSY.
+
+Run from the project root with:
+    python -m benchmarks.bench_database
+"""
+
+import os
+import random
+import tempfile
+import threading
+import time
+
+from src.database import DbManager
+
+ROWS          = 10000
+DURATION      = 2.0
+READER_COUNTS = [1, 2, 4, 8]
+
+
+def run(db: DbManager, readers: int) -> tuple:
+    stop = threading.Event()
+    reads = [0] * readers
+    writes = [0]
+
+    def read(index: int) -> None:
+        while not stop.is_set():
+            db.get_value(random.randint(1, ROWS))
+            reads[index] += 1
+
+    def write() -> None:
+        while not stop.is_set():
+            link_id = db.insert_value("https://example.com")
+            db.increment_clicks(random.randint(1, link_id))
+            writes[0] += 2
+
+    threads = [threading.Thread(target=read, args=(i,)) for i in range(readers)]
+    threads.append(threading.Thread(target=write))
+    for thread in threads:
+        thread.start()
+    time.sleep(DURATION)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    return sum(reads) / DURATION, writes[0] / DURATION
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        db = DbManager("sqlite:///" + os.path.join(directory, "bench.db"),
+                       read_pool_size=max(READER_COUNTS))
+        for _ in range(ROWS):
+            db.insert_value("https://example.com")
+
+        print(f"{ROWS} rows, {DURATION}s per run, 1 concurrent writer\n")
+        for readers in READER_COUNTS:
+            read_rate, write_rate = run(db, readers)
+            print(f"  {readers} reader(s): {read_rate:>10.0f} reads/s  {write_rate:>8.0f} writes/s")
+
+        db.close()
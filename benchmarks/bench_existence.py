@@ -0,0 +1,77 @@
+"""Measures the memory of IdBitmap and the miss-path latency of DbManager
+under a scanner workload.
+
+The scanner requests random short codes of 1 to 8 characters, almost none
+of which exist. Each miss is looked up through `DbManager.get_value`
+(rejected by the bitmap) and through a plain database query, as done
+before the bitmap.
+
+Run from the project root with:
+    python -m benchmarks.bench_existence
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+from src.charset import URLCharset
+from src.codec import Codec
+from src.database import DbManager, Link
+from src.existence import IdBitmap
+
+ROWS     = 100000
+REQUESTS = 20000
+
+MEMORY_SIZES = [100_000, 600_000, 1_000_000, 1_048_577, 5_000_000]
+
+
+def scanner_ids(codec: Codec, live_ids: IdBitmap) -> list:
+    ids = []
+    while len(ids) < REQUESTS:
+        code = "".join(random.choice(codec.charset) for _ in range(random.randint(1, 8)))
+        id = codec.decode(code)
+        if id not in live_ids:
+            ids.append(id)
+    return ids
+
+
+def time_per_call(function, ids: list) -> float:
+    start = time.perf_counter()
+    for id in ids:
+        function(id)
+    return (time.perf_counter() - start) / len(ids) * 1e6
+
+
+if __name__ == "__main__":
+    print("IdBitmap memory")
+    for links in MEMORY_SIZES:
+        bitmap = IdBitmap(range(1, links + 1))
+        used, allocated = bitmap.memory_bytes, sys.getsizeof(bitmap.bits)
+        print(f"  {links:>9} links: {used / 1024:7.1f} KiB used, "
+              f"{allocated / 1024:7.1f} KiB allocated "
+              f"({allocated / links * 1_000_000 / 1024:.1f} KiB per million)")
+    print()
+
+    codec = Codec(charset=URLCharset(numeric=True, lowercase_ascii=True,
+                                     uppercase_ascii=True, special=False))
+
+    with tempfile.TemporaryDirectory() as directory:
+        db = DbManager("sqlite:///" + os.path.join(directory, "bench.db"))
+        for _ in range(ROWS):
+            db.insert_value("https://example.com")
+
+        ids = scanner_ids(codec, db.live_ids)
+
+        def query(id: int) -> None:
+            if id > 2 ** 63 - 1:
+                return
+            with db.reader() as session:
+                session.query(Link).filter(Link.id == id).first()
+
+        print(f"{ROWS} rows, {REQUESTS} scanner misses")
+        print(f"  database query: {time_per_call(query, ids):8.2f} us/miss")
+        print(f"  IdBitmap:       {time_per_call(db.get_value, ids):8.2f} us/miss")
+
+        db.close()
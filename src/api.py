@@ -1,12 +1,16 @@
+import json
 import os
 import re
+import threading
+from contextlib import asynccontextmanager
+from typing import Optional
 from urllib.parse import urlparse
 
 from dotenv import load_dotenv
-from fastapi import FastAPI, status
-from fastapi.responses import RedirectResponse, FileResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI, HTTPException, Request, status
+from fastapi.responses import RedirectResponse, Response
 
+from .cache import StaticCache, content_etag, etag_matches, negotiate_encoding
 from .charset import URLCharset
 from .codec import Codec
 from .database import DbManager
@@ -38,29 +42,118 @@ if not PROTOCOL or not HOST:
 DOMAIN_NAME  = f"{PROTOCOL}://{HOST}/"
 SHORT_URL    = DOMAIN_NAME[len(PROTOCOL) + len("://"):]
 
+# Cache lifetimes in seconds, a max-age of 0 makes clients revalidate every
+# time. Static URLs aren't versioned, so a long static max-age would serve
+# stale assets after a deployment. A decode max-age under-counts clicks.
+STATIC_MAX_AGE = int(os.getenv("VITE_STATIC_MAX_AGE", 0))
+DECODE_MAX_AGE = int(os.getenv("VITE_DECODE_MAX_AGE", 0))
+
+# Number of read-only SQLite connections serving lookups, writes always go
+# through a single connection
+READ_POOL_SIZE = int(os.getenv("VITE_READ_POOL_SIZE", 4))
+
 ## CORE LOGIC ##
 
 url_charset = URLCharset(numeric=True, lowercase_ascii=True,
                          uppercase_ascii=True, special=False)
 codec       = Codec(charset=url_charset)
-app         = FastAPI(docs_url="/docs/")
+
+# The DbManager is created on first use by get_db, and closed on shutdown
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    close_db()
+
+app         = FastAPI(docs_url="/docs/", lifespan=lifespan)
 
 
 # Create the data folder if it doesn't exist, it will contain the database file
 os.makedirs(DATA_PATH, exist_ok=True)
     
-# "/static/" avoids collisions with a possible /static generated path in the future
-app.mount("/static/", StaticFiles(directory=STATIC_PATH), name="static")
+# Static files are read and precompressed once, at startup
+static_cache = StaticCache(STATIC_PATH)
+
+_db_manager: Optional[DbManager] = None
+_db_manager_lock = threading.Lock()
+
+def get_db() -> DbManager:
+    """Returns the DbManager of DB_PATH, created on first use and then shared
+    by every request so that its connections are reused."""
+    global _db_manager
+    db_manager = _db_manager
+    if db_manager is None:
+        with _db_manager_lock:
+            if _db_manager is None:
+                _db_manager = DbManager(DB_PATH, read_pool_size=READ_POOL_SIZE)
+            db_manager = _db_manager
+    return db_manager
+
+def close_db() -> None:
+    """Closes the connections of the DbManager, the next `get_db` call
+    creates a new one."""
+    global _db_manager
+    with _db_manager_lock:
+        if _db_manager is not None:
+            _db_manager.close()
+            _db_manager = None
 
 def is_local_or_relative_url(url: str) -> bool:
     """Determines if the input URL related to the domain name."""
     return url.startswith(DOMAIN_NAME) or url.startswith(SHORT_URL)
 
+def cache_control(max_age: int) -> str:
+    """Returns the Cache-Control header value for a max-age in seconds."""
+    if max_age <= 0:
+        return "no-cache"
+    return f"public, max-age={max_age}"
+
+def static_response(request: Request, path: str, max_age: int) -> Response:
+    """Serves a cached static file in the best encoding accepted by the
+    client, or a 304 if the client already holds the same representation."""
+    
+    asset = static_cache.get(path)
+    if asset is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"),
+                                  asset.variants.keys())
+    headers = {
+        "ETag": asset.etag_for(encoding),
+        "Cache-Control": cache_control(max_age),
+        "Vary": "Accept-Encoding",
+    }
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    return Response(asset.variants[encoding], media_type=asset.media_type,
+                    headers=headers)
+
+def json_response(request: Request, content: dict, max_age: int) -> Response:
+    """Serves a JSON body with a content-hashed ETag, answering a 304 if
+    the client already holds it."""
+    
+    body = json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    headers = {"ETag": content_etag(body), "Cache-Control": cache_control(max_age)}
+    
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    return Response(body, media_type="application/json", headers=headers)
+
 ## API ENDPOINTS ##
 
 @app.get("/")
-def read_root() -> dict:
-    return FileResponse(f"{STATIC_PATH}/index.html")
+def read_root(request: Request) -> Response:
+    # The front page is always revalidated, the ETag makes that cheap
+    return static_response(request, "index.html", max_age=0)
+
+# "/static/" avoids collisions with a possible /static generated path in the future
+@app.api_route("/static/{path:path}", methods=["GET", "HEAD"])
+def read_static(request: Request, path: str) -> Response:
+    return static_response(request, path, max_age=STATIC_MAX_AGE)
 
 @app.get("/encode")
 def encode_value(value: str) -> dict:
@@ -78,8 +171,7 @@ def encode_value(value: str) -> dict:
     elif is_local_or_relative_url(value):
         return {"error": f"You can't encode a {DOMAIN_NAME} URL."}
     
-    with DbManager(DB_PATH) as db:
-        unique_id: int = db.insert_value(value)
+    unique_id: int = get_db().insert_value(value)
         
     encoded_uid: str = codec.encode(unique_id)
     
@@ -89,6 +181,26 @@ def encode_value(value: str) -> dict:
 
 
 @app.get("/decode")
+def decode_endpoint(request: Request, url: str) -> Response:
+    """Decodes a shortened URL to its original URL or text value.
+
+    Found values are served with an ETag and a `VITE_DECODE_MAX_AGE` max-age.
+
+    Args:
+        url (str): The shortened URL to decode
+
+    Returns:
+        Response: The JSON response of `decode_url`
+    """
+    
+    result = decode_url(url)
+    
+    # A missing ID may be created later on, so errors are never cached
+    if "error" in result.keys():
+        return json_response(request, result, max_age=0)
+    
+    return json_response(request, result, max_age=DECODE_MAX_AGE)
+
 def decode_url(url: str) -> dict:
     """Decodes a shortened URL to its original URL or text value.
 
@@ -115,8 +227,7 @@ def decode_url(url: str) -> dict:
     if decoded_uid > 2 ** 63 - 1: # OverflowError: Python int too large to convert to SQLite INTEGER
         return {"error": "No such shortened URL found"}
     
-    with DbManager(DB_PATH) as db:
-        result = db.get_value(decoded_uid)
+    result = get_db().get_value(decoded_uid)
     
     if not isinstance(result, tuple):
         return {"error": "No such shortened URL found"}
@@ -171,9 +282,8 @@ def redirect_url(url: str) -> RedirectResponse:
 
     is_url = codec.is_value_url(original_url)
     
-    with DbManager(DB_PATH) as db:
-        decoded_id: int = codec.decode(url)
-        db.increment_clicks(decoded_id)
+    decoded_id: int = codec.decode(url)
+    get_db().increment_clicks(decoded_id)
 
     if not is_url:
          return RedirectResponse(f"/decode?url={url}")
@@ -183,4 +293,5 @@ def redirect_url(url: str) -> RedirectResponse:
     if not is_absolute:
         original_url = f"https://{original_url}"
     
-    return RedirectResponse(original_url, status_code=status.HTTP_301_MOVED_PERMANENTLY)
+    return RedirectResponse(original_url, status_code=status.HTTP_301_MOVED_PERMANENTLY,
+                            headers={"Cache-Control": cache_control(DECODE_MAX_AGE)})
@@ -0,0 +1,141 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional
+
+# Brotli is optional, without it only gzip variants are built
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Preferred order when the client accepts several encodings equally
+ENCODINGS = ("br", "gzip", "identity")
+
+# Files smaller than this aren't worth the compression headers
+MIN_COMPRESS_SIZE = 256
+
+
+def content_etag(data: bytes) -> str:
+    """Returns a strong, quoted ETag derived from the content hash."""
+    return '"' + hashlib.sha256(data).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Returns True if the If-None-Match header value matches the ETag.
+
+    Uses the weak comparison mandated by RFC 9110 for If-None-Match, so
+    `W/"abc"` matches `"abc"`.
+    """
+    if not if_none_match:
+        return False
+
+    if if_none_match.strip() == "*":
+        return True
+
+    etag = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        if candidate.strip().removeprefix("W/") == etag:
+            return True
+
+    return False
+
+
+def negotiate_encoding(accept_encoding: Optional[str], available: Iterable[str]) -> str:
+    """Picks the best encoding among `available` for an Accept-Encoding
+    header value, falling back to "identity".
+    """
+    available = set(available)
+    if not accept_encoding:
+        return "identity"
+
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        weights[name] = quality
+
+    best, best_quality = "identity", 0.0
+    for encoding in ENCODINGS:
+        if encoding not in available or encoding == "identity":
+            continue
+        quality = weights.get(encoding, weights.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+
+    return best
+
+
+@dataclass(frozen=True)
+class CachedAsset:
+    """An in-memory static file and its precompressed variants.
+
+    Args:
+        media_type (str): The Content-Type to serve the asset with
+        variants (dict): Encoded bodies keyed by content-coding, always
+        containing "identity"
+        etag (str): Content hash of the identity body
+    """
+
+    media_type: str
+    variants: Dict[str, bytes]
+    etag: str
+
+    def etag_for(self, encoding: str) -> str:
+        """Each encoding is a different representation, so it gets its own
+        ETag, suffixed after the content hash."""
+        if encoding == "identity":
+            return self.etag
+        return self.etag[:-1] + "-" + encoding + '"'
+
+
+class StaticCache:
+    """Loads every file of a directory in memory at startup, along with
+    gzip (and brotli, when available) variants whenever they are smaller.
+
+    Args:
+        directory (str): Path to the directory to serve
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self.assets: Dict[str, CachedAsset] = {}
+
+        for root, _, files in os.walk(directory):
+            for name in files:
+                full_path = os.path.join(root, name)
+                relative_path = os.path.relpath(full_path, directory).replace(os.sep, "/")
+                with open(full_path, "rb") as file:
+                    self.assets[relative_path] = self.build_asset(name, file.read())
+
+    @staticmethod
+    def build_asset(name: str, data: bytes) -> CachedAsset:
+        media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        if media_type.startswith("text/") or media_type == "application/javascript":
+            media_type += "; charset=utf-8"
+
+        variants = {"identity": data}
+        if len(data) >= MIN_COMPRESS_SIZE:
+            compressed = {"gzip": gzip.compress(data, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                compressed["br"] = brotli.compress(data)
+            for encoding, body in compressed.items():
+                if len(body) < len(data):
+                    variants[encoding] = body
+
+        return CachedAsset(media_type=media_type, variants=variants,
+                           etag=content_etag(data))
+
+    def get(self, path: str) -> Optional[CachedAsset]:
+        """Returns the cached asset for a path relative to the directory."""
+        return self.assets.get(path)
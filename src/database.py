@@ -1,72 +1,176 @@
-import sqlite3
+import threading
+import time
 
-from sqlalchemy import create_engine, Column, String, Integer
+from contextlib import contextmanager, nullcontext
+from sqlalchemy import create_engine, event, Column, String, Integer
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, scoped_session, Session
-from typing import Optional, Tuple
+from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import QueuePool, StaticPool
+from typing import Iterator, Optional, Tuple
+
+from .existence import IdBitmap
 
 Base = declarative_base()
 
 class Link(Base):
     __tablename__ = 'links'
-    
+
     id = Column(Integer, primary_key=True)
     value = Column(String, nullable=False)
     clicks = Column(Integer, default=0)
-    
-    
+
+
+def _enable_wal(dbapi_connection, connection_record) -> None:
+    """Switches the database to WAL so readers never block on the writer."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+
 class DbManager:
     """Generic database class to handle sqlite3 database operations.
 
-    `__enter__` and `__exit__` methods are used to handle the connection
-    to the database and to close it when the context manager is exited.
-    
-    Using the `with` statement, the connection to the database will be
-    automatically closed when the block is exited. And if an exception
-    occurs, the transaction will be rolled back.
-    
+    Reads go through a pool of read-only connections (`mode=ro`), while
+    every mutation goes through a single writer connection guarded by a
+    lock. Writes are thus serialized in-process instead of contending for
+    the SQLite lock, and WAL lets readers run alongside the writer.
+
+    In-memory databases can't be shared between connections, so readers
+    then use the writer connection.
+
+    Live IDs are also kept in an `IdBitmap`, so lookups of unknown IDs
+    return without a database round trip. IDs above its watermark may have
+    been written by another process, so they trigger a reload of newer IDs,
+    at most once every `refresh_interval` seconds.
+
+    The `with` statement is still supported, each operation commits (or
+    rolls back) its own transaction.
 
     Args:
-        db_path (str): Path to the database file.
+        db_url (str): SQLAlchemy URL of the database file.
+        read_pool_size (int): Number of read-only connections.
+        refresh_interval (float): Minimum delay in seconds between two
+        reloads of IDs above the watermark.
     """
-    
-    def __init__(self, db_url: str) -> None:
-        self.engine = create_engine(db_url)
-        Base.metadata.create_all(self.engine)
-        self.session_factory = sessionmaker(bind=self.engine)
-        self.Session = scoped_session(self.session_factory)
-    
-    def __enter__(self) -> Session:
-        self.session = self.Session()
+
+    def __init__(self, db_url: str, read_pool_size: int = 4,
+                 refresh_interval: float = 1.0) -> None:
+        self.db_url = db_url
+        self.refresh_interval = refresh_interval
+        url = make_url(db_url)
+        connect_args = {"check_same_thread": False}
+        in_memory = url.database in (None, "", ":memory:")
+
+        self.write_engine = create_engine(url, poolclass=StaticPool,
+                                          connect_args=connect_args)
+        if not in_memory:
+            event.listen(self.write_engine, "connect", _enable_wal)
+        Base.metadata.create_all(self.write_engine)
+        self.write_lock = threading.Lock()
+        self.WriteSession = sessionmaker(bind=self.write_engine)
+
+        if in_memory:
+            self.read_engine = self.write_engine
+            self.read_lock = self.write_lock
+        else:
+            read_url = url.set(database=f"file:{url.database}",
+                               query={"mode": "ro", "uri": "true"})
+            self.read_engine = create_engine(read_url, poolclass=QueuePool,
+                                             pool_size=read_pool_size,
+                                             max_overflow=0,
+                                             connect_args=connect_args)
+            self.read_lock = nullcontext()
+        self.ReadSession = sessionmaker(bind=self.read_engine)
+
+        self.live_ids = IdBitmap()
+        self.last_refresh = time.monotonic()
+        self.load_live_ids(after=0)
+
+    def __enter__(self) -> "DbManager":
         return self
 
     def __exit__(self, ext_type, exc_value, traceback) -> None:
-        self.Session.remove()
-        if exc_value:
-            self.session.rollback()
-        else:
-            self.session.commit()
-        
+        pass
+
+    def close(self) -> None:
+        """Closes every connection of both the reader pool and the writer."""
+        self.read_engine.dispose()
+        self.write_engine.dispose()
+
+    @contextmanager
+    def reader(self) -> Iterator[Session]:
+        """Yields a session bound to a read-only connection."""
+        with self.read_lock:
+            session = self.ReadSession()
+            try:
+                yield session
+            finally:
+                session.close()
+
+    @contextmanager
+    def writer(self) -> Iterator[Session]:
+        """Yields a session bound to the writer connection, holding the write
+        lock until the transaction is committed or rolled back."""
+        with self.write_lock:
+            session = self.WriteSession()
+            try:
+                yield session
+                session.commit()
+            except Exception:
+                session.rollback()
+                raise
+            finally:
+                session.close()
+
+    def load_live_ids(self, after: int) -> None:
+        """Adds the IDs greater than `after` found in the database to the
+        live IDs."""
+
+        with self.reader() as session:
+            query = session.query(Link.id).filter(Link.id > after)
+            for link_id, in query.yield_per(10000):
+                self.live_ids.add(link_id)
+
     def insert_value(self, value: str) -> int:
         """Inserts a new URL or text value in the database and returns the row ID"""
 
-        new_link = Link(value=value)
-        self.session.add(new_link)
-        self.session.commit()
-        return new_link.id
-    
+        with self.writer() as session:
+            watermark = self.live_ids.watermark
+            new_link = Link(value=value)
+            session.add(new_link)
+            session.flush()
+            link_id = new_link.id
+        # Added once committed, so a lookup never sees the ID before the row.
+        # A gap means another process wrote rows in between.
+        if link_id > watermark + 1:
+            self.load_live_ids(after=watermark)
+        else:
+            self.live_ids.add(link_id)
+        return link_id
+
     def increment_clicks(self, link_id: int) -> None:
         """Increments the number of clicks for a given shortened link ID."""
-        
-        link = self.session.query(Link).filter(Link.id == link_id).first()
-        if link:
-            link.clicks += 1
-            self.session.commit()
-                
+
+        with self.writer() as session:
+            session.query(Link).filter(Link.id == link_id).update(
+                {Link.clicks: Link.clicks + 1}, synchronize_session=False)
+
     def get_value(self, link_id: int) -> Optional[Tuple]:
         """Returns an URL or text value from the database based on its id."""
 
-        link = self.session.query(Link).filter(Link.id == link_id).first()
-        if link:
-            return link.value, link.clicks
-        return None
\ No newline at end of file
+        now = time.monotonic()
+        if (link_id > self.live_ids.watermark
+                and now - self.last_refresh >= self.refresh_interval):
+            self.last_refresh = now
+            self.load_live_ids(after=self.live_ids.watermark)
+
+        if link_id not in self.live_ids:
+            return None
+
+        with self.reader() as session:
+            link = session.query(Link).filter(Link.id == link_id).first()
+            if link:
+                return link.value, link.clicks
+        return None
@@ -0,0 +1,57 @@
+import threading
+
+from typing import Iterable
+
+class IdBitmap:
+    """In-memory set of live link IDs, answering "definitely not a link"
+    without touching the database.
+
+    IDs are handed out sequentially by SQLite, so a bitmap of one bit per ID
+    up to the highest ID (the watermark) is both exact and compact: 122 KiB
+    per million links, up to 12% more once bytearray's spare capacity is
+    counted. Anything above the watermark is rejected
+    before the bitmap is even looked at.
+
+    It only knows about IDs added through it, so IDs written by other
+    processes must be added by its owner.
+
+    Args:
+        ids (Iterable[int]): IDs already present in the database
+    """
+
+    def __init__(self, ids: Iterable[int] = ()) -> None:
+        self.bits = bytearray()
+        self.watermark = 0
+        self.lock = threading.Lock()
+
+        for id in ids:
+            self.add(id)
+
+    def __contains__(self, id: int) -> bool:
+        if id <= 0 or id > self.watermark:
+            return False
+        return self.bits[id >> 3] & (1 << (id & 7)) != 0
+
+    def __len__(self) -> int:
+        return sum(bin(byte).count("1") for byte in self.bits)
+
+    def add(self, id: int) -> None:
+        """Marks an ID as live, growing the bitmap if needed."""
+        with self.lock:
+            index = id >> 3
+            if index >= len(self.bits):
+                # bytearray over-allocates its buffer, keeping appends amortized
+                self.bits.extend(bytes(index + 1 - len(self.bits)))
+            self.bits[index] |= 1 << (id & 7)
+            self.watermark = max(self.watermark, id)
+
+    def discard(self, id: int) -> None:
+        """Marks an ID as no longer live, e.g. once deleted or expired."""
+        with self.lock:
+            if 0 < id <= self.watermark:
+                self.bits[id >> 3] &= ~(1 << (id & 7)) & 0xFF
+
+    @property
+    def memory_bytes(self) -> int:
+        """Size of the bitmap in bytes."""
+        return len(self.bits)
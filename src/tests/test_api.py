@@ -18,8 +18,10 @@ from src.api import app, DOMAIN_NAME, SHORT_URL, is_local_or_relative_url
 @pytest.fixture(autouse=True)
 def run_around_tests():
     # Create the db then deletes it
-    api.DbManager(api.DB_PATH)
+    db = api.DbManager(api.DB_PATH)
     yield
+    db.close()
+    api.close_db()
     os.remove(api.DB_PATH.replace("sqlite:///", ""))
     
 def test_ensure_protocol():
@@ -40,6 +42,13 @@ def test_boilerplate_incorrect_path():
         assert response.status_code == 404
         assert response.json() == {"detail": "Not Found"}
 
+def test_encode_without_lifespan():
+    # Not entering the client skips the startup and shutdown events
+    client = TestClient(app)
+    response = client.get("/encode?value=https://www.wikipedia.org/")
+    assert response.status_code == 200
+    assert "url" in response.json()
+
 def test_empty_url():
     with TestClient(app) as client:
         response = client.get("/encode?value=")
@@ -186,4 +195,84 @@ def test_refuse_encode_local_or_relative():
         response = client.get("/encode?value=vite.lol/")
         assert response.status_code == 200
         assert response.json() == {"error": f"You can't encode a {DOMAIN_NAME} URL."}
-    
\ No newline at end of file
+    
+def test_boilerplate_revalidation():
+    with TestClient(app) as client:
+        response = client.get("/")
+        assert response.headers["cache-control"] == "no-cache"
+        etag = response.headers["etag"]
+        
+        response = client.get("/", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+
+def test_static_precompressed():
+    with TestClient(app) as client:
+        response = client.get("/static/particles.js", headers={"Accept-Encoding": "gzip"})
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert response.headers["cache-control"] == "no-cache"
+        
+        response = client.get("/static/particles.js", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in response.headers
+        with open(api.STATIC_PATH + "/particles.js", "rb") as file:
+            assert response.content == file.read()
+
+def test_static_change_forces_revalidation(monkeypatch, tmp_path):
+    asset = tmp_path / "index.css"
+    asset.write_text("body { margin: 0; }")
+    monkeypatch.setattr(api, "static_cache", api.StaticCache(str(tmp_path)))
+    with TestClient(app) as client:
+        response = client.get("/static/index.css")
+        assert response.headers["cache-control"] == "no-cache"
+        etag = response.headers["etag"]
+        
+        response = client.get("/static/index.css", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        
+        # A new deployment, the cache is rebuilt at startup
+        asset.write_text("body { margin: 1em; }")
+        monkeypatch.setattr(api, "static_cache", api.StaticCache(str(tmp_path)))
+        response = client.get("/static/index.css", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.text == "body { margin: 1em; }"
+        assert response.headers["etag"] != etag
+
+def test_static_not_found():
+    with TestClient(app) as client:
+        response = client.get("/static/missing.js")
+        assert response.status_code == 404
+        assert response.json() == {"detail": "Not Found"}
+
+def test_decode_revalidation():
+    with TestClient(app) as client:
+        response = client.get("/encode?value=https://www.wikipedia.org/")
+        shortened_url = response.json()["url"]
+        response = client.get(f"/decode?url={shortened_url}")
+        etag = response.headers["etag"]
+        assert response.headers["cache-control"] == "no-cache"
+        
+        response = client.get(f"/decode?url={shortened_url}", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        
+        # A click changes the body, hence the ETag
+        client.get(f"/redirect/{shortened_url}", follow_redirects=False)
+        response = client.get(f"/decode?url={shortened_url}", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()["clicks"] == 1
+
+def test_decode_max_age(monkeypatch):
+    monkeypatch.setattr(api, "DECODE_MAX_AGE", 60)
+    with TestClient(app) as client:
+        response = client.get("/encode?value=https://www.wikipedia.org/")
+        shortened_url = response.json()["url"]
+        response = client.get(f"/decode?url={shortened_url}")
+        assert response.headers["cache-control"] == "public, max-age=60"
+        
+        response = client.get(f"/redirect/{shortened_url}", follow_redirects=False)
+        assert response.status_code == 301
+        assert response.headers["cache-control"] == "public, max-age=60"
+        
+        response = client.get(f"/decode?url={DOMAIN_NAME}zz")
+        assert response.headers["cache-control"] == "no-cache"
@@ -0,0 +1,65 @@
+import gzip
+
+import pytest
+
+from src.cache import (CachedAsset, StaticCache, content_etag, etag_matches,
+                       negotiate_encoding)
+
+@pytest.fixture
+def static_dir(tmp_path):
+    (tmp_path / "big.css").write_text("body { margin: 0; }\n" * 100)
+    (tmp_path / "tiny.txt").write_text("hi")
+    (tmp_path / "nested").mkdir()
+    (tmp_path / "nested" / "file.js").write_text("console.log(1);\n" * 100)
+    return tmp_path
+
+@pytest.fixture
+def static_cache(static_dir) -> StaticCache:
+    return StaticCache(str(static_dir))
+
+def test_content_etag_is_quoted_and_stable():
+    etag = content_etag(b"hello")
+    assert etag.startswith('"') and etag.endswith('"')
+    assert etag == content_etag(b"hello")
+    assert etag != content_etag(b"hello!")
+
+def test_etag_matches():
+    etag = content_etag(b"hello")
+    assert etag_matches(etag, etag) == True
+    assert etag_matches(f'"other", {etag}', etag) == True
+    assert etag_matches(f"W/{etag}", etag) == True
+    assert etag_matches("*", etag) == True
+    assert etag_matches('"other"', etag) == False
+    assert etag_matches(None, etag) == False
+
+def test_negotiate_encoding():
+    available = ("identity", "gzip", "br")
+    assert negotiate_encoding(None, available) == "identity"
+    assert negotiate_encoding("gzip", available) == "gzip"
+    assert negotiate_encoding("gzip, deflate, br", available) == "br"
+    assert negotiate_encoding("br;q=0.5, gzip", available) == "gzip"
+    assert negotiate_encoding("br;q=0, gzip;q=0", available) == "identity"
+    assert negotiate_encoding("*", available) == "br"
+    assert negotiate_encoding("br", ("identity", "gzip")) == "identity"
+
+def test_static_cache_loads_nested_files(static_cache: StaticCache):
+    assert set(static_cache.assets.keys()) == {"big.css", "tiny.txt", "nested/file.js"}
+    assert static_cache.get("missing.css") is None
+
+def test_static_cache_compresses_large_files(static_cache: StaticCache, static_dir):
+    asset = static_cache.get("big.css")
+    assert isinstance(asset, CachedAsset)
+    assert asset.media_type == "text/css; charset=utf-8"
+    assert asset.variants["identity"] == (static_dir / "big.css").read_bytes()
+    assert gzip.decompress(asset.variants["gzip"]) == asset.variants["identity"]
+    assert len(asset.variants["gzip"]) < len(asset.variants["identity"])
+
+def test_static_cache_skips_tiny_files(static_cache: StaticCache):
+    asset = static_cache.get("tiny.txt")
+    assert list(asset.variants.keys()) == ["identity"]
+
+def test_etag_differs_per_encoding(static_cache: StaticCache):
+    asset = static_cache.get("big.css")
+    assert asset.etag_for("identity") == asset.etag
+    assert asset.etag_for("gzip") != asset.etag
+    assert asset.etag_for("gzip").startswith(asset.etag[:-1])
@@ -1,4 +1,8 @@
+import threading
+
 import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
 
 from ..database import DbManager
 
@@ -31,4 +35,75 @@ def test_increment_clicks(db_manager):
 def test_get_value_invalid_id(db_manager):
     with db_manager as db:
         result = db.get_value(999)  # Assuming 999 is an ID that does not exist
-        assert result is None
\ No newline at end of file
+        assert result is None
+
+@pytest.fixture
+def file_db_manager(tmp_path):
+    manager = DbManager(f"sqlite:///{tmp_path}/test.db", read_pool_size=2)
+    yield manager
+    manager.close()
+
+def test_file_reads_see_writes(file_db_manager):
+    link_id = file_db_manager.insert_value("https://example.com")
+    file_db_manager.increment_clicks(link_id)
+    assert file_db_manager.get_value(link_id) == ("https://example.com", 1)
+
+def test_file_readers_are_read_only(file_db_manager):
+    with pytest.raises(OperationalError):
+        with file_db_manager.reader() as session:
+            session.execute(text("DELETE FROM links"))
+
+def test_concurrent_writes_are_serialized(file_db_manager):
+    link_id = file_db_manager.insert_value("https://example.com")
+
+    def click():
+        for _ in range(50):
+            file_db_manager.increment_clicks(link_id)
+
+    threads = [threading.Thread(target=click) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    _, clicks = file_db_manager.get_value(link_id)
+    assert clicks == 200
+
+def test_unknown_ids_skip_the_database(file_db_manager):
+    link_id = file_db_manager.insert_value("https://example.com")
+    assert link_id in file_db_manager.live_ids
+
+    file_db_manager.refresh_interval = float("inf")
+    file_db_manager.close()
+    file_db_manager.ReadSession = None # Any database access would now fail
+    assert file_db_manager.get_value(link_id + 1) is None
+
+def test_live_ids_built_at_startup(tmp_path):
+    db_url = f"sqlite:///{tmp_path}/test.db"
+    manager = DbManager(db_url)
+    link_id = manager.insert_value("https://example.com")
+    manager.close()
+
+    manager = DbManager(db_url)
+    assert link_id in manager.live_ids
+    assert manager.get_value(link_id) == ("https://example.com", 0)
+    manager.close()
+
+
+def test_live_ids_see_other_writers(tmp_path):
+    db_url = f"sqlite:///{tmp_path}/test.db"
+    manager = DbManager(db_url, refresh_interval=0)
+    other = DbManager(db_url)
+
+    # Above the watermark, the lookup reloads the newer IDs
+    link_id = other.insert_value("https://example.com")
+    assert manager.get_value(link_id) == ("https://example.com", 0)
+
+    # Below the watermark, the gap is filled when inserting
+    first_id = other.insert_value("https://example.org")
+    second_id = manager.insert_value("https://example.net")
+    assert second_id == first_id + 1
+    assert first_id in manager.live_ids
+
+    manager.close()
+    other.close()
@@ -0,0 +1,38 @@
+import pytest
+
+from src.existence import IdBitmap
+
+@pytest.fixture
+def bitmap() -> IdBitmap:
+    return IdBitmap([1, 2, 3, 10])
+
+def test_contains(bitmap: IdBitmap):
+    for id in (1, 2, 3, 10):
+        assert id in bitmap
+    for id in (0, -1, 4, 9, 11, 2 ** 63):
+        assert id not in bitmap
+
+def test_watermark(bitmap: IdBitmap):
+    assert bitmap.watermark == 10
+    bitmap.add(5)
+    assert bitmap.watermark == 10
+    bitmap.add(1000)
+    assert bitmap.watermark == 1000
+    assert 1000 in bitmap
+    assert 999 not in bitmap
+
+def test_len(bitmap: IdBitmap):
+    assert len(bitmap) == 4
+    assert len(IdBitmap()) == 0
+
+def test_discard(bitmap: IdBitmap):
+    bitmap.discard(2)
+    assert 2 not in bitmap
+    assert 1 in bitmap and 3 in bitmap
+    bitmap.discard(12345) # Unknown IDs are ignored
+    assert len(bitmap) == 3
+
+def test_memory_is_one_bit_per_id():
+    bitmap = IdBitmap(range(1, 1_000_001))
+    assert len(bitmap) == 1_000_000
+    assert bitmap.memory_bytes == 1_000_000 // 8 + 1